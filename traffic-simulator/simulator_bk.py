@@ -3,18 +3,148 @@
 Redis Traffic Simulator
 Simulates network traffic with multiple nodes generating packets,
 publishing to Redis pub/sub, and storing data for pressure testing.
+All nodes run as coroutines on a single asyncio event loop.
 """
 
-import redis
-import json
+import asyncio
+import redis.asyncio as aioredis
+from redis.asyncio.cluster import ClusterNode, RedisCluster
+from redis.exceptions import ConnectionError as RedisConnectionError, ResponseError, TimeoutError as RedisTimeoutError
+import orjson
+import numpy as np
 import time
-import threading
-import random
 import signal
+import socket
+import struct
 import sys
-from typing import List, Dict
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Dict, Optional
 import argparse
 
+# msgpack is only needed for --publish-format msgpack
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# numba is only needed for --generator numba
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# Binary layout of a list field with --storage-format binary:
+# 100 little-endian uint32 values (400 bytes), read back with struct.unpack("<100I", ...)
+PACKET_LIST_DTYPE = np.dtype("<u4")
+
+
+# Server-side HSET + EXPIRE for a whole batch in one EVALSHA.
+# ARGV[1] is the TTL, followed by 8 field/value pairs (16 args) per key.
+STORE_PACKETS_SCRIPT = """
+local ttl = ARGV[1]
+local j = 2
+for i = 1, #KEYS do
+    redis.call('HSET', KEYS[i], unpack(ARGV, j, j + 15))
+    redis.call('EXPIRE', KEYS[i], ttl)
+    j = j + 16
+end
+return #KEYS
+"""
+
+
+# --storage-format blob: one string value per packet, written with SET ... EX.
+# ARGV[1] is the TTL, followed by one blob per key.
+STORE_BLOBS_SCRIPT = """
+local ttl = ARGV[1]
+for i = 1, #KEYS do
+    redis.call('SET', KEYS[i], ARGV[i + 1], 'EX', ttl)
+end
+return #KEYS
+"""
+
+# Blob layout: little-endian uint32 timestamp and total_bytes, the 4 raw octets of
+# source_ip and dest_ip, then udp_packets, udp_bytes, tcp_packets and tcp_bytes as
+# 100 little-endian uint32 each (1616 bytes in total)
+PACKET_BLOB_HEADER = struct.Struct("<II4s4s")
+
+
+# JSON publish messages are assembled from pre-encoded pieces with these templates,
+# producing the same bytes as orjson.dumps() of the envelope dict. IPs are plain
+# ASCII and need no escaping.
+ENVELOPE_JSON_TEMPLATE = b'{"timestamp":%d,"packet_count":%d,"packets":[%b]}'
+PACKET_JSON_TEMPLATE = (
+    b'{"timestamp":%d,"source_ip":"%b","dest_ip":"%b","total_bytes":%d,'
+    b'"udp_packets":%b,"udp_bytes":%b,"tcp_packets":%b,"tcp_bytes":%b}'
+)
+
+
+# Published messages from all nodes are sent by one writer task: up to
+# PUBLISH_BATCH_SIZE messages per write, waiting at most PUBLISH_LINGER_SECONDS
+# for other nodes to enqueue theirs. Replies are only read back once
+# PUBLISH_MAX_PENDING_REPLIES of them are outstanding.
+PUBLISH_BATCH_SIZE = 64
+PUBLISH_LINGER_SECONDS = 0.005
+PUBLISH_MAX_PENDING_REPLIES = 1000
+
+
+@dataclass
+class PacketBatch:
+    """A batch of packets stored column-wise; row i of every field is packet i."""
+    timestamp: int
+    source_ips: List[str]
+    dest_ips: List[str]
+    total_bytes: np.ndarray  # shape (N,)
+    udp_packets: np.ndarray  # shape (N, 100), likewise for the other list fields
+    udp_bytes: np.ndarray
+    tcp_packets: np.ndarray
+    tcp_bytes: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.source_ips)
+    
+    def to_dicts(self) -> List[Dict]:
+        """Materialize per-packet dicts, converting each column to Python once."""
+        return [
+            {
+                "timestamp": self.timestamp,
+                "source_ip": source_ip,
+                "dest_ip": dest_ip,
+                "total_bytes": total_bytes,
+                "udp_packets": udp_packets,
+                "udp_bytes": udp_bytes,
+                "tcp_packets": tcp_packets,
+                "tcp_bytes": tcp_bytes
+            }
+            for source_ip, dest_ip, total_bytes, udp_packets, udp_bytes, tcp_packets, tcp_bytes in zip(
+                self.source_ips, self.dest_ips, self.total_bytes.tolist(),
+                self.udp_packets.tolist(), self.udp_bytes.tolist(),
+                self.tcp_packets.tolist(), self.tcp_bytes.tolist()
+            )
+        ]
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _fill_batch(total_bytes, octets, udp_packets, udp_bytes, tcp_packets, tcp_bytes):
+        """Fill preallocated batch arrays in place, one packet per prange iteration.
+        
+        Packets are independent, so rows are spread across all cores. Numba keeps
+        a separate random state per thread; randint's upper bound is exclusive.
+        """
+        for i in prange(udp_packets.shape[0]):
+            total_bytes[i] = np.random.randint(64, 1501)
+            for j in range(4):
+                octets[i, j] = np.random.randint(1, 256)
+            for j in range(udp_packets.shape[1]):
+                udp_packets[i, j] = np.random.randint(64, 1501)
+                udp_bytes[i, j] = np.random.randint(1000, 60001)
+                tcp_packets[i, j] = np.random.randint(100, 1001)
+                tcp_bytes[i, j] = np.random.randint(1000, 600001)
+
 
 class PacketGenerator:
     """Generates simulated network packets with various attributes."""
@@ -22,154 +152,270 @@ class PacketGenerator:
     @staticmethod
     def generate_packet(node_id: int, packet_id: int) -> Dict:
         """Generate a single packet with random data."""
-        return {
-            "timestamp": int(time.time()),
-            "source_ip": f"192.168.{random.randint(1, 255)}.{random.randint(1, 255)}",
-            "dest_ip": f"10.0.{random.randint(1, 255)}.{random.randint(1, 255)}",
-            "total_bytes": random.randint(64, 1500),
-            "udp_packets": [random.randint(64, 1500) for _ in range(100)],
-            "udp_bytes": [random.randint(1000, 60000) for _ in range(100)],
-            "tcp_packets": [random.randint(100, 1000) for _ in range(100)],
-            "tcp_bytes": [random.randint(1000, 600000) for _ in range(100)]
-       }
+        return PacketGenerator.generate_batch(node_id, 1, packet_id).to_dicts()[0]
     
     @staticmethod
-    def generate_batch(node_id: int, batch_size: int, start_id: int) -> List[Dict]:
-        """Generate a batch of packets."""
-        return [
-            PacketGenerator.generate_packet(node_id, start_id + i)
-            for i in range(batch_size)
-        ]
+    def generate_batch(node_id: int, batch_size: int, start_id: int,
+                       use_numba: bool = False) -> PacketBatch:
+        """Generate a batch of packets.
+        
+        Each field is drawn for the whole batch in a single NumPy call instead of
+        one random.randint() per value. Upper bounds are exclusive in NumPy, so
+        they are one above the inclusive random.randint() ranges. With use_numba,
+        the arrays are filled by the parallel _fill_batch kernel instead.
+        """
+        if use_numba:
+            return PacketGenerator._generate_batch_numba(batch_size)
+        
+        rng = np.random.default_rng()
+        # Network prefixes are constant, so only the last two octets are random
+        return PacketBatch(
+            timestamp=int(time.time()),
+            source_ips=['192.168.%d.%d' % tuple(r) for r in rng.integers(1, 256, size=(batch_size, 2)).tolist()],
+            dest_ips=['10.0.%d.%d' % tuple(r) for r in rng.integers(1, 256, size=(batch_size, 2)).tolist()],
+            total_bytes=rng.integers(64, 1501, size=batch_size),
+            udp_packets=rng.integers(64, 1501, size=(batch_size, 100), dtype=np.uint32),
+            udp_bytes=rng.integers(1000, 60001, size=(batch_size, 100), dtype=np.uint32),
+            tcp_packets=rng.integers(100, 1001, size=(batch_size, 100), dtype=np.uint32),
+            tcp_bytes=rng.integers(1000, 600001, size=(batch_size, 100), dtype=np.uint32)
+        )
+
+    
+    @staticmethod
+    def _generate_batch_numba(batch_size: int) -> PacketBatch:
+        """Generate a batch of packets with the numba kernel."""
+        total_bytes = np.empty(batch_size, dtype=np.int64)
+        octets = np.empty((batch_size, 4), dtype=np.int64)
+        lists = [np.empty((batch_size, 100), dtype=np.uint32) for _ in range(4)]
+        _fill_batch(total_bytes, octets, *lists)
+        
+        octets = octets.tolist()
+        return PacketBatch(
+            timestamp=int(time.time()),
+            source_ips=['192.168.%d.%d' % (r[0], r[1]) for r in octets],
+            dest_ips=['10.0.%d.%d' % (r[2], r[3]) for r in octets],
+            total_bytes=total_bytes,
+            udp_packets=lists[0],
+            udp_bytes=lists[1],
+            tcp_packets=lists[2],
+            tcp_bytes=lists[3]
+        )
 
 
 class TrafficNode:
     """Represents a single node generating traffic."""
     
-    def __init__(self, node_id: int, redis_client: redis.Redis, 
+    def __init__(self, node_id: int, redis_client: aioredis.Redis, 
+                 pub_queue: asyncio.Queue = None,
                  packets_per_second: int = 100, 
                  publish_enabled: bool = False,
                  storage_enabled: bool = False,
-                 channel_name: str = "traffic_channel"):
+                 channel_name: str = "traffic_channel",
+                 publish_format: str = "json",
+                 storage_format: str = "json",
+                 generator: str = "numpy",
+                 cluster_mode: bool = False):
         self.node_id = node_id
         self.redis_client = redis_client
+        self.pub_queue = pub_queue
         self.packets_per_second = packets_per_second
         self.publish_enabled = publish_enabled
         self.storage_enabled = storage_enabled
         self.channel_name = channel_name
+        self.publish_format = publish_format
+        self.storage_format = storage_format
+        self.use_numba = generator == "numba"
+        # In cluster mode the {node_id} hash tag keeps all of a node's keys in one
+        # slot, so each batch's script call stays on a single shard
+        self.key_prefix = f"packet:{{{node_id}}}:" if cluster_mode else "packet:"
+        self._encode_list = self._pack_list if storage_format == "binary" else self._dump_list
         self.running = False
         self.packet_counter = 0
-        self.stats = {
-            "packets_generated": 0,
-            "packets_published": 0,
-            "packets_stored": 0,
-            "publish_errors": 0,
-            "storage_errors": 0,
-        }
+        # register_script() caches the SHA and reloads the script on NOSCRIPT
+        if storage_format == "blob":
+            self._store_script = redis_client.register_script(STORE_BLOBS_SCRIPT)
+            self._store_args = self._blob_store_args
+        else:
+            self._store_script = redis_client.register_script(STORE_PACKETS_SCRIPT)
+            self._store_args = self._hash_store_args
+        # Plain int attributes: an update is an attribute add, not a dict lookup + store
+        self.packets_generated = 0
+        self.packets_published = 0
+        self.packets_stored = 0
+        self.publish_errors = 0
+        self.storage_errors = 0
     
-    def run(self, duration_seconds: int = None):
-        """Run the traffic generator."""
+    async def run(self, duration_seconds: int = None):
+        """Run the traffic generator until stopped or the duration is reached."""
         self.running = True
-        start_time = time.time()
+        start_time = time.monotonic()
         batch_interval = 1.0  # Generate batches every second
+        # Batches are scheduled on a fixed grid (start + k * interval), so the
+        # time spent generating and writing a batch does not accumulate as drift
+        deadline = start_time
         
         print(f"[Node {self.node_id}] Starting traffic generation...")
         print(f"[Node {self.node_id}] Publish: {self.publish_enabled}, Storage: {self.storage_enabled}")
         
         try:
             while self.running:
-                batch_start = time.time()
+                batch_start = time.monotonic()
                 
                 # Generate packets
-                packets = PacketGenerator.generate_batch(
+                batch = PacketGenerator.generate_batch(
                     self.node_id, 
                     self.packets_per_second, 
-                    self.packet_counter
+                    self.packet_counter,
+                    use_numba=self.use_numba
                 )
                 self.packet_counter += self.packets_per_second
-                self.stats["packets_generated"] += len(packets)
+                self.packets_generated += len(batch)
                 
                 # Publish to Redis channel
                 if self.publish_enabled:
-                    self._publish_packets(packets)
+                    self._publish_packets(batch)
                 
                 # Store in Redis
                 if self.storage_enabled:
-                    self._store_packets(packets)
+                    await self._store_packets(batch)
                 
                 # Check if duration exceeded
-                if duration_seconds and (time.time() - start_time) >= duration_seconds:
+                if duration_seconds and (time.monotonic() - start_time) >= duration_seconds:
                     print(f"[Node {self.node_id}] Duration reached, stopping...")
                     break
                 
-                # Sleep to maintain rate
-                elapsed = time.time() - batch_start
-                sleep_time = max(0, batch_interval - elapsed)
+                # Sleep until the next batch is due
+                deadline += batch_interval
+                sleep_time = deadline - time.monotonic()
                 if sleep_time > 0:
-                    time.sleep(sleep_time)
+                    await asyncio.sleep(sleep_time)
                 else:
+                    elapsed = time.monotonic() - batch_start
                     print(f"[Node {self.node_id}] WARNING: Cannot maintain {self.packets_per_second} pps (took {elapsed:.3f}s)")
                 
-        except KeyboardInterrupt:
+        except asyncio.CancelledError:
             print(f"\n[Node {self.node_id}] Interrupted by user")
+            raise
         finally:
             self.running = False
-            self._print_stats()
     
-    def _publish_packets(self, packets: List[Dict]):
-        """Publish packets to Redis pub/sub channel."""
+    def _publish_packets(self, batch: PacketBatch):
+        """Queue packets for the simulator's pub/sub writer."""
         try:
-            # Publish the entire batch as a JSON array
-            message = json.dumps({
-                "timestamp": packets[0]['timestamp'],
-                "packet_count": len(packets),
-                "packets": packets
-            })
-            self.redis_client.publish(self.channel_name, message)
-            self.stats["packets_published"] += len(packets)
+            # Publish the entire batch as a single message
+            # Both encoders return bytes, which redis-py publishes as-is
+            if self.publish_format == "msgpack":
+                message = msgpack.packb({
+                    "timestamp": batch.timestamp,
+                    "packet_count": len(batch),
+                    "packets": batch.to_dicts()
+                }, use_bin_type=True)
+            else:
+                message = self._dump_envelope(batch)
+            # The writer counts packets_published once the message is sent
+            self.pub_queue.put_nowait((self, self.channel_name, message, len(batch)))
         except Exception as e:
-            self.stats["publish_errors"] += 1
+            self.publish_errors += 1
             print(f"[Node {self.node_id}] Publish error: {e}")
     
-    def _store_packets(self, packets: List[Dict]):
-        """Store packets in Redis using various data structures."""
+    @staticmethod
+    def _dump_list(row: np.ndarray) -> bytes:
+        """Encode a list field row as a JSON array."""
+        return orjson.dumps(row, option=orjson.OPT_SERIALIZE_NUMPY)
+    
+    @staticmethod
+    def _dump_envelope(batch: PacketBatch) -> bytes:
+        """Encode a batch as the JSON publish message.
+        
+        List rows are encoded straight from the NumPy columns and spliced into
+        the byte templates, skipping the per-packet dicts of to_dicts().
+        """
+        dump = TrafficNode._dump_list
+        timestamp = batch.timestamp
+        packets = b",".join(
+            PACKET_JSON_TEMPLATE % (
+                timestamp, source_ip.encode(), dest_ip.encode(), total_bytes,
+                dump(udp_packets), dump(udp_bytes), dump(tcp_packets), dump(tcp_bytes)
+            )
+            for source_ip, dest_ip, total_bytes, udp_packets, udp_bytes, tcp_packets, tcp_bytes in zip(
+                batch.source_ips, batch.dest_ips, batch.total_bytes.tolist(),
+                batch.udp_packets, batch.udp_bytes, batch.tcp_packets, batch.tcp_bytes
+            )
+        )
+        return ENVELOPE_JSON_TEMPLATE % (timestamp, len(batch), packets)
+    
+    @staticmethod
+    def _pack_list(row: np.ndarray) -> bytes:
+        """Pack a list field row into its fixed-size binary form."""
+        return row.astype(PACKET_LIST_DTYPE, copy=False).tobytes()
+    
+    def _hash_store_args(self, batch: PacketBatch):
+        """Build the keys and args of STORE_PACKETS_SCRIPT for a batch."""
+        encode = self._encode_list
+        # Shared by every packet in the batch; encode it once instead of per packet
+        timestamp = str(batch.timestamp)
+        keys = []
+        args = [3600]  # Expire after 1 hour
+        
+        # Rows go straight from the NumPy columns to the encoder, no per-packet dicts
+        for source_ip, dest_ip, total_bytes, udp_packets, udp_bytes, tcp_packets, tcp_bytes in zip(
+            batch.source_ips, batch.dest_ips, batch.total_bytes.tolist(),
+            batch.udp_packets, batch.udp_bytes, batch.tcp_packets, batch.tcp_bytes
+        ):
+            # Store each packet as a hash
+            # Encode list fields (JSON or binary) since Redis hashes don't support nested structures
+            keys.append(f"{self.key_prefix}{dest_ip}:{source_ip}:{timestamp}")
+            args.extend((
+                "timestamp", timestamp,
+                "source_ip", source_ip,
+                "dest_ip", dest_ip,
+                "total_bytes", str(total_bytes),
+                "udp_packets", encode(udp_packets),
+                "udp_bytes", encode(udp_bytes),
+                "tcp_packets", encode(tcp_packets),
+                "tcp_bytes", encode(tcp_bytes),
+            ))
+        return keys, args
+    
+    def _blob_store_args(self, batch: PacketBatch):
+        """Build the keys and args of STORE_BLOBS_SCRIPT for a batch."""
+        timestamp = batch.timestamp
+        # All four list fields of a packet side by side, ready to copy out per row
+        lists = np.hstack(
+            (batch.udp_packets, batch.udp_bytes, batch.tcp_packets, batch.tcp_bytes)
+        ).astype(PACKET_LIST_DTYPE, copy=False)
+        keys = []
+        args = [3600]  # Expire after 1 hour
+        
+        for source_ip, dest_ip, total_bytes, row in zip(
+            batch.source_ips, batch.dest_ips, batch.total_bytes.tolist(), lists
+        ):
+            keys.append(f"{self.key_prefix}{dest_ip}:{source_ip}:{timestamp}")
+            args.append(
+                PACKET_BLOB_HEADER.pack(
+                    timestamp, total_bytes, socket.inet_aton(source_ip), socket.inet_aton(dest_ip)
+                ) + row.tobytes()
+            )
+        return keys, args
+    
+    async def _store_packets(self, batch: PacketBatch):
+        """Store packets in Redis with a single server-side script call."""
         try:
-            pipeline = self.redis_client.pipeline()
-            
-            for packet in packets:
-                # Store each packet as a hash
-                # Convert list fields to JSON strings since Redis hashes don't support nested structures
-                key = f"packet:{packet['dest_ip']}:{packet['source_ip']}:{packet['timestamp']}"
-                
-                # Prepare packet data with serialized lists (required for Redis hashes)
-                packet_data = {
-                    "timestamp": packet["timestamp"],
-                    "source_ip": packet["source_ip"],
-                    "dest_ip": packet["dest_ip"],
-                    "total_bytes": str(packet["total_bytes"]),
-                    "udp_packets": json.dumps(packet["udp_packets"]),
-                    "udp_bytes": json.dumps(packet["udp_bytes"]),
-                    "tcp_packets": json.dumps(packet["tcp_packets"]),
-                    "tcp_bytes": json.dumps(packet["tcp_bytes"])
-                }
-                
-                # Batch insert using pipeline
-                pipeline.hset(key, mapping=packet_data)
-                pipeline.expire(key, 3600)  # Expire after 1 hour
-            
-            pipeline.execute()
-            self.stats["packets_stored"] += len(packets)
+            keys, args = self._store_args(batch)
+            await self._store_script(keys=keys, args=args)
+            self.packets_stored += len(batch)
         except Exception as e:
-            self.stats["storage_errors"] += 1
+            self.storage_errors += 1
             print(f"[Node {self.node_id}] Storage error: {e}")
     
     def _print_stats(self):
         """Print statistics for this node."""
         print(f"\n[Node {self.node_id}] Final Statistics:")
-        print(f"  Packets Generated: {self.stats['packets_generated']}")
-        print(f"  Packets Published: {self.stats['packets_published']}")
-        print(f"  Packets Stored:    {self.stats['packets_stored']}")
-        print(f"  Publish Errors:    {self.stats['publish_errors']}")
-        print(f"  Storage Errors:    {self.stats['storage_errors']}")
+        print(f"  Packets Generated: {self.packets_generated}")
+        print(f"  Packets Published: {self.packets_published}")
+        print(f"  Packets Stored:    {self.packets_stored}")
+        print(f"  Publish Errors:    {self.publish_errors}")
+        print(f"  Storage Errors:    {self.storage_errors}")
 
 
 class TrafficSimulator:
@@ -180,49 +426,158 @@ class TrafficSimulator:
                  redis_host: str = "localhost",
                  redis_port: int = 6379,
                  redis_db: int = 0,
+                 redis_cluster_nodes: Optional[List[str]] = None,
                  publish_enabled: bool = True,
                  storage_enabled: bool = True,
                  channel_name: str = "traffic_channel",
+                 publish_format: str = "json",
+                 storage_format: str = "json",
+                 generator: str = "numpy",
                  stats_interval: int = 5):
         
+        if publish_format == "msgpack" and not MSGPACK_AVAILABLE:
+            raise RuntimeError("msgpack not available. Install it with: pip install msgpack")
+        if generator == "numba" and not NUMBA_AVAILABLE:
+            raise RuntimeError("numba not available. Install it with: pip install numba")
+        
         self.num_nodes = num_nodes
         self.packets_per_second = packets_per_second
         self.publish_enabled = publish_enabled
         self.storage_enabled = storage_enabled
         self.channel_name = channel_name
+        self.publish_format = publish_format
+        self.storage_format = storage_format
+        self.generator = generator
         self.stats_interval = stats_interval
+        self.redis_host = redis_host
+        self.redis_port = redis_port
+        self.redis_db = redis_db
+        self.redis_cluster_nodes = redis_cluster_nodes
+        self.redis_client = None
+        self.pub_queue = None
         self.start_time = None
-        self.stats_running = False
-        
-        # Connect to Redis
+        self.nodes = []
+    
+    async def _connect(self):
+        """Create the asyncio Redis (or Redis Cluster) client shared by all nodes."""
         try:
-            self.redis_client = redis.Redis(
-                host=redis_host,
-                port=redis_port,
-                db=redis_db,
-                decode_responses=True
+            if self.redis_cluster_nodes:
+                startup_nodes = []
+                for address in self.redis_cluster_nodes:
+                    host, _, port = address.rpartition(":")
+                    startup_nodes.append(ClusterNode(host, int(port)))
+                self.redis_client = RedisCluster(startup_nodes=startup_nodes)
+                await self.redis_client.ping()
+                print(f"✓ Connected to Redis Cluster via {', '.join(self.redis_cluster_nodes)}")
+                return
+            
+            self.redis_client = aioredis.Redis(
+                host=self.redis_host,
+                port=self.redis_port,
+                db=self.redis_db
             )
-            self.redis_client.ping()
-            print(f"✓ Connected to Redis at {redis_host}:{redis_port}")
+            await self.redis_client.ping()
+            print(f"✓ Connected to Redis at {self.redis_host}:{self.redis_port}")
         except Exception as e:
             print(f"✗ Failed to connect to Redis: {e}")
             raise
+    
+    def _make_publish_connection(self):
+        """Create a connection owned by the publish writer for the whole run."""
+        if isinstance(self.redis_client, RedisCluster):
+            # PUBLISH is broadcast over the cluster bus, so any node will do
+            return self.redis_client.get_default_node().acquire_connection()
+        return self.redis_client.connection_pool.make_connection()
+    
+    @staticmethod
+    def _forget_unread_replies(awaiting_reply: deque, error):
+        """Un-count every message whose reply can no longer be read."""
+        while awaiting_reply:
+            node, packet_count = awaiting_reply.popleft()
+            node.packets_published -= packet_count
+            node.publish_errors += 1
+            print(f"[Node {node.node_id}] Publish error: {error}")
+    
+    @classmethod
+    async def _read_publish_replies(cls, conn, awaiting_reply: deque):
+        """Read the replies of earlier PUBLISHes, un-counting any that failed.
         
-        self.nodes = []
-        self.threads = []
+        A lost connection takes every unread reply with it, so all of those
+        messages are un-counted rather than just the one being read.
+        """
+        while awaiting_reply:
+            try:
+                await conn.read_response()
+            except ResponseError as e:
+                node, packet_count = awaiting_reply.popleft()
+                node.packets_published -= packet_count
+                node.publish_errors += 1
+                print(f"[Node {node.node_id}] Publish error: {e}")
+            except (RedisConnectionError, RedisTimeoutError, OSError) as e:
+                cls._forget_unread_replies(awaiting_reply, e)
+                await conn.disconnect()
+            else:
+                awaiting_reply.popleft()
     
-    def _print_periodic_stats(self):
-        """Print statistics periodically in a background thread."""
-        while self.stats_running:
-            time.sleep(self.stats_interval)
-            if not self.stats_running:
-                break
+    async def _publish_writer(self):
+        """Publish messages queued by all nodes without waiting for their replies.
+        
+        Each batch of messages goes out in one packed write on a dedicated
+        connection. The integer replies (subscriber counts) are drained every
+        PUBLISH_MAX_PENDING_REPLIES messages to catch errors and keep the socket's
+        receive buffer from filling, and once more at shutdown.
+        """
+        conn = self._make_publish_connection()
+        awaiting_reply = deque()  # (node, packet_count) of each unread reply
+        try:
+            while True:
+                pending = [await self.pub_queue.get()]
+                # Give other nodes a moment to enqueue so they share the write
+                await asyncio.sleep(PUBLISH_LINGER_SECONDS)
+                while len(pending) < PUBLISH_BATCH_SIZE and not self.pub_queue.empty():
+                    pending.append(self.pub_queue.get_nowait())
+                
+                try:
+                    await conn.send_packed_command(
+                        conn.pack_commands(
+                            ("PUBLISH", channel, message) for _, channel, message, _ in pending
+                        ),
+                        check_health=False
+                    )
+                except Exception as e:
+                    # Unread replies are lost with the connection; it reconnects on the next send
+                    self._forget_unread_replies(awaiting_reply, e)
+                    for node, _, _, _ in pending:
+                        node.publish_errors += 1
+                        print(f"[Node {node.node_id}] Publish error: {e}")
+                else:
+                    for node, _, _, packet_count in pending:
+                        node.packets_published += packet_count
+                        awaiting_reply.append((node, packet_count))
+                    if len(awaiting_reply) >= PUBLISH_MAX_PENDING_REPLIES:
+                        await self._read_publish_replies(conn, awaiting_reply)
+                
+                for _ in pending:
+                    self.pub_queue.task_done()
+        finally:
+            # Closing with unread replies resets the connection, which can drop
+            # messages the server has not processed yet
+            try:
+                await asyncio.wait_for(self._read_publish_replies(conn, awaiting_reply), timeout=5)
+            except Exception as e:
+                self._forget_unread_replies(awaiting_reply, e)
+            await conn.disconnect()
+    
+    async def _print_periodic_stats(self):
+        """Print statistics periodically until cancelled."""
+        while True:
+            await asyncio.sleep(self.stats_interval)
             
             elapsed = int(time.time() - self.start_time)
-            total_generated = sum(node.stats["packets_generated"] for node in self.nodes)
-            total_published = sum(node.stats["packets_published"] for node in self.nodes)
-            total_stored = sum(node.stats["packets_stored"] for node in self.nodes)
-            total_errors = sum(node.stats["publish_errors"] + node.stats["storage_errors"] for node in self.nodes)
+            total_generated = sum(node.packets_generated for node in self.nodes)
+            total_published = sum(node.packets_published for node in self.nodes)
+            total_stored = sum(node.packets_stored for node in self.nodes)
+            total_errors = sum(node.publish_errors + node.storage_errors for node in self.nodes)
             
             # Format time as MM:SS
             minutes, seconds = divmod(elapsed, 60)
@@ -240,73 +595,86 @@ class TrafficSimulator:
         print(f"Nodes:              {self.num_nodes}")
         print(f"Packets/sec/node:   {self.packets_per_second}")
         print(f"Total packets/sec:  {self.num_nodes * self.packets_per_second}")
+        print(f"Generator:          {self.generator}")
         print(f"Publish enabled:    {self.publish_enabled}")
         print(f"Storage enabled:    {self.storage_enabled}")
+        if self.storage_enabled:
+            print(f"Storage format:     {self.storage_format}")
         if self.publish_enabled:
             print(f"Channel name:       {self.channel_name}")
+            print(f"Publish format:     {self.publish_format}")
         if duration_seconds:
             print(f"Duration:           {duration_seconds} seconds")
         print(f"Stats interval:     {self.stats_interval} seconds")
         print(f"{'='*60}\n")
         
+        try:
+            asyncio.run(self._run(duration_seconds))
+        except KeyboardInterrupt:
+            print("\n\nShutting down all nodes...")
+        
+        print(f"\n{'='*60}")
+        print("Simulation Complete")
+        print(f"{'='*60}")
+        self._print_aggregate_stats()
+    
+    async def _run(self, duration_seconds: int = None):
+        """Run every node as a coroutine on the current event loop."""
+        await self._connect()
+        
+        if self.generator == "numba":
+            # Compile (or load the cached) kernel before the clock starts
+            PacketGenerator.generate_batch(0, 1, 0, use_numba=True)
+            print("✓ Numba packet generator ready")
+        
         # Record start time
         self.start_time = time.time()
+        self.pub_queue = asyncio.Queue()
         
-        # Create and start nodes
+        # Create nodes
         for i in range(self.num_nodes):
-            node = TrafficNode(
+            self.nodes.append(TrafficNode(
                 node_id=i + 1,
                 redis_client=self.redis_client,
+                pub_queue=self.pub_queue,
                 packets_per_second=self.packets_per_second,
                 publish_enabled=self.publish_enabled,
                 storage_enabled=self.storage_enabled,
-                channel_name=self.channel_name
-            )
-            self.nodes.append(node)
-            
-            thread = threading.Thread(
-                target=node.run,
-                args=(duration_seconds,),
-                name=f"Node-{i+1}"
-            )
-            thread.start()
-            self.threads.append(thread)
+                channel_name=self.channel_name,
+                publish_format=self.publish_format,
+                storage_format=self.storage_format,
+                generator=self.generator,
+                cluster_mode=bool(self.redis_cluster_nodes)
+            ))
         
-        # Start periodic stats printer
-        self.stats_running = True
-        stats_thread = threading.Thread(
-            target=self._print_periodic_stats,
-            name="StatsReporter",
-            daemon=True
-        )
-        stats_thread.start()
+        # Start the shared publisher and the periodic stats printer
+        tasks = []
+        if self.publish_enabled:
+            tasks.append(asyncio.create_task(self._publish_writer()))
+        if self.stats_interval > 0:
+            tasks.append(asyncio.create_task(self._print_periodic_stats()))
         
-        # Wait for all threads
         try:
-            for thread in self.threads:
-                thread.join()
-        except KeyboardInterrupt:
-            print("\n\nShutting down all nodes...")
-            self.stats_running = False
-            for node in self.nodes:
-                node.running = False
-            for thread in self.threads:
-                thread.join(timeout=2)
+            await asyncio.gather(*(node.run(duration_seconds) for node in self.nodes))
+            # Let the writer flush the last batches the nodes queued
+            await self.pub_queue.join()
         finally:
-            self.stats_running = False
-        
-        print(f"\n{'='*60}")
-        print("Simulation Complete")
-        print(f"{'='*60}")
-        self._print_aggregate_stats()
+            for task in tasks:
+                task.cancel()
+            # Let the writer drain its unread replies and disconnect before the
+            # client closes; publish error counts are final after this
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for node in self.nodes:
+                node._print_stats()
+            await self.redis_client.aclose()
     
     def _print_aggregate_stats(self):
         """Print aggregate statistics across all nodes."""
-        total_generated = sum(node.stats["packets_generated"] for node in self.nodes)
-        total_published = sum(node.stats["packets_published"] for node in self.nodes)
-        total_stored = sum(node.stats["packets_stored"] for node in self.nodes)
-        total_pub_errors = sum(node.stats["publish_errors"] for node in self.nodes)
-        total_store_errors = sum(node.stats["storage_errors"] for node in self.nodes)
+        total_generated = sum(node.packets_generated for node in self.nodes)
+        total_published = sum(node.packets_published for node in self.nodes)
+        total_stored = sum(node.packets_stored for node in self.nodes)
+        total_pub_errors = sum(node.publish_errors for node in self.nodes)
+        total_store_errors = sum(node.storage_errors for node in self.nodes)
         
         print(f"\nAggregate Statistics:")
         print(f"  Total Packets Generated: {total_generated:,}")
@@ -356,6 +724,11 @@ def main():
         "--redis-db", type=int, default=0,
         help="Redis database number"
     )
+    parser.add_argument(
+        "--redis-cluster-nodes", type=str, default=None,
+        help="Comma-separated host:port startup nodes of a Redis Cluster "
+             "(overrides --redis-host/--redis-port/--redis-db)"
+    )
     parser.add_argument(
         "--publish", type=str_to_bool, default=False,
         help="Enable or disable Redis pub/sub publishing (True|False)"
@@ -364,10 +737,24 @@ def main():
         "--storage", type=str_to_bool, default=True,
         help="Enable or disable Redis data storage (True|False)"
     )
+    parser.add_argument(
+        "--storage-format", choices=["json", "binary", "blob"], default="json",
+        help="Stored packet encoding: hash with JSON or packed uint32 list fields, "
+             "or one packed binary string per packet"
+    )
+    parser.add_argument(
+        "--generator", choices=["numpy", "numba"], default="numpy",
+        help="Packet generator: vectorized NumPy, or a parallel numba kernel that scales "
+             "across cores (requires: pip install numba)"
+    )
     parser.add_argument(
         "--channel", type=str, default="traffic_channel",
         help="Redis pub/sub channel name (default: traffic_channel)"
     )
+    parser.add_argument(
+        "--publish-format", choices=["json", "msgpack"], default="json",
+        help="Encoding of published batches (msgpack requires: pip install msgpack)"
+    )
     parser.add_argument(
         "--stats-interval", type=int, default=5,
         help="Interval in seconds for printing statistics (0 to disable)"
@@ -390,9 +777,13 @@ def main():
             redis_host=args.redis_host,
             redis_port=args.redis_port,
             redis_db=args.redis_db,
+            redis_cluster_nodes=args.redis_cluster_nodes.split(",") if args.redis_cluster_nodes else None,
             publish_enabled=args.publish,
             storage_enabled=args.storage,
             channel_name=args.channel,
+            publish_format=args.publish_format,
+            storage_format=args.storage_format,
+            generator=args.generator,
             stats_interval=args.stats_interval
         )
         